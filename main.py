@@ -1,78 +1,212 @@
-from fastapi import FastAPI, Request, HTTPException, Form
-from fastapi.responses import RedirectResponse, HTMLResponse
+from fastapi import FastAPI, Request, HTTPException, Form, Depends
+from fastapi.responses import RedirectResponse, HTMLResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-import google.oauth2.id_token
-from google.auth.transport import requests
-from google.cloud import firestore
+from cachetools import LRUCache, TTLCache
+from jinja2 import FileSystemBytecodeCache
 from datetime import datetime
+import asyncio
+import hashlib
+import os
+import time
 
-app = FastAPI()
-firebase_request_adapter = requests.Request()
+app = FastAPI(default_response_class=ORJSONResponse)
 app.mount("/static", StaticFiles(directory="static"), name="static")
-templates = Jinja2Templates(directory="templates")
-db = firestore.Client()
+# Compiled templates are kept in memory and in a private per-user cache directory so workers
+# skip re-parsing them; source files are only re-checked for changes outside production
+templates = Jinja2Templates(
+    directory="templates",
+    bytecode_cache=FileSystemBytecodeCache(),
+    auto_reload=os.environ.get("APP_ENV") != "production",
+    cache_size=400
+)
+# Google client libraries (grpc, protobuf, crypto) are imported on startup, not at module import
+firestore = None
+id_token = None
+AlreadyExists = None
+NotFound = None
+firebase_request_adapter = None
+# Firestore client and collections, created per worker process on startup
+db = None
+USERS = None
+BOARDS = None
+# Decoded claims keyed by a digest of the ID token, so repeat requests skip signature checks
+token_cache = LRUCache(maxsize=4096)
+# User directory for the create-board page and user search, refreshed at most once a minute
+users_cache = TTLCache(maxsize=1, ttl=60)
+# Boards keep task summaries in their own document up to this many tasks, then fall back to the subcollection
+TASKS_SUMMARY_LIMIT = 100
+# Descriptions are cut to this length in task summaries to keep board documents small
+SUMMARY_DESCRIPTION_LENGTH = 200
+
+class AuthRedirect(Exception):
+    """Raised when a request has no valid login token"""
+
+@app.exception_handler(AuthRedirect)
+async def auth_redirect_handler(request: Request, exc: AuthRedirect):
+    return RedirectResponse(url="/", status_code=302)
+
+@app.on_event("startup")
+async def init_google_clients():
+    """Import the Google libraries and create one Firestore client per worker, never shared across forks"""
+    global firestore, id_token, AlreadyExists, NotFound, firebase_request_adapter, db, USERS, BOARDS
+    from google.api_core.exceptions import AlreadyExists, NotFound
+    from google.auth.transport import requests as google_requests
+    from google.cloud import firestore
+    from google.oauth2 import id_token
+    firebase_request_adapter = google_requests.Request()
+    db = firestore.AsyncClient()
+    USERS = db.collection("users")
+    BOARDS = db.collection("task_boards")
 
 # Helper Functions
 async def verify_firebase_token(request: Request):
     token = request.cookies.get("token")
     if not token:
         return None
+    token_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    cached = token_cache.get(token_key)
+    if cached:
+        decoded_token, expires_at = cached
+        if expires_at > time.time():
+            return decoded_token
+        token_cache.pop(token_key, None)
     try:
-        decoded_token = google.oauth2.id_token.verify_firebase_token(token, firebase_request_adapter)
+        decoded_token = id_token.verify_firebase_token(token, firebase_request_adapter)
+        token_cache[token_key] = (decoded_token, decoded_token["exp"])
         return decoded_token
     except ValueError as e:
         print(f"Token verification failed: {str(e)}")
         return None
 
-async def get_user_uid(request: Request):
+async def current_user(request: Request) -> str:
+    """Resolve the logged-in user's UID, redirecting to login if the token is missing or invalid"""
     user = await verify_firebase_token(request)
     if not user:
-        return RedirectResponse(url="/", status_code=302)
+        raise AuthRedirect()
     return user['user_id']
 
-async def is_board_member(user_uid: str, task_board_ref) -> bool:
+async def load_task_board(task_board_id: str, field_paths: list = None) -> dict:
+    """Fetch and decode a task board, optionally projected to the given fields"""
+    task_board = await BOARDS.document(task_board_id).get(field_paths=field_paths)
+    if not task_board.exists:
+        raise HTTPException(status_code=404, detail="Task board not found")
+    return task_board.to_dict()
+
+async def get_task_board(task_board_id: str) -> dict:
+    """Fetch and decode the task board document once per request, without its task summaries"""
+    return await load_task_board(task_board_id, [
+        "name", "description", "created_by", "created_at", "members",
+        "member_profiles", "task_count", "summarize_tasks"
+    ])
+
+async def get_task_board_with_tasks(task_board_id: str) -> dict:
+    """Fetch and decode the whole task board document, including its task summaries"""
+    return await load_task_board(task_board_id)
+
+async def get_task_board_access(task_board_id: str) -> dict:
+    """Fetch only the fields needed for membership and creator checks, plus the task counters"""
+    return await load_task_board(task_board_id, ["members", "created_by", "task_count", "summarize_tasks"])
+
+async def get_task_board_membership(task_board_id: str) -> dict:
+    """Fetch the fields needed to change a board's membership"""
+    return await load_task_board(task_board_id, ["members", "created_by", "member_profiles"])
+
+def normalize_title(title: str) -> str:
+    """Form of a task title used to tell duplicates apart, ignoring case and surrounding spaces"""
+    return title.lower().strip()
+
+def task_id_for(title: str) -> str:
+    """Task document ID derived from its title, so duplicate titles collide on the same key"""
+    return hashlib.sha1(normalize_title(title).encode()).hexdigest()[:20]
+
+async def has_task_titled(task_board_ref, title: str, exclude_id: str = None) -> bool:
+    """Check for another task with the same normalized title, for boards that may hold tasks with random IDs"""
+    normalized = normalize_title(title)
+    async for task_doc in task_board_ref.collection("tasks").select(["title"]).stream():
+        if task_doc.id != exclude_id and normalize_title(task_doc.to_dict().get("title") or "") == normalized:
+            return True
+    return False
+
+def parse_deadline(deadline: str):
+    """Parse a YYYY-MM-DD deadline from a date input, or None if missing or invalid"""
+    if not deadline:
+        return None
+    try:
+        return datetime.fromisoformat(deadline)
+    except ValueError:
+        return None
+
+def summary_description(description: str) -> str:
+    """Description shortened for a task summary"""
+    if description and len(description) > SUMMARY_DESCRIPTION_LENGTH:
+        return description[:SUMMARY_DESCRIPTION_LENGTH - 1] + "…"
+    return description
+
+def task_summary(task_id: str, task_data: dict) -> dict:
+    """Fields of a task shown on the board page, kept on the board under tasks_summary"""
+    return {
+        "id": task_id,
+        "title": task_data.get("title"),
+        "description": summary_description(task_data.get("description")),
+        "status": task_data.get("status"),
+        "created_at": task_data.get("created_at"),
+        "deadline": task_data.get("deadline"),
+        "completed_at": task_data.get("completed_at"),
+        "assigned_members": [m.id for m in task_data.get("assigned_members", [])]
+    }
+
+def task_summary_path(task_id: str, *fields: str) -> str:
+    """Quoted field path of a task's entry (or one of its fields) in the board's tasks_summary"""
+    return firestore.FieldPath("tasks_summary", task_id, *fields).to_api_repr()
+
+def is_board_member(user_uid: str, task_board_data: dict) -> bool:
     """Check if user is a member of the task board"""
-    task_board = task_board_ref.get()
-    return any(member.id == user_uid for member in task_board.to_dict().get("members", []))
+    return any(member.id == user_uid for member in task_board_data.get("members", []))
 
-async def is_board_creator(user_uid: str, task_board_ref) -> bool:
+def is_board_creator(user_uid: str, task_board_data: dict) -> bool:
     """Check if user is the creator of the task board"""
-    task_board = task_board_ref.get()
-    return task_board.to_dict().get("created_by").id == user_uid
+    return task_board_data.get("created_by").id == user_uid
+
+def member_profile(user_doc) -> dict:
+    """Display fields of a user, as shown in member lists and stored on task boards"""
+    user_data = user_doc.to_dict()
+    return {
+        "id": user_doc.id,
+        "name": user_data.get("fullName", "Unknown User"),
+        "email": user_data.get("email", "")
+    }
 
-async def get_board_members(task_board_ref):
+async def get_member_profiles(member_refs) -> list:
+    """Fetch display fields for the given user references, keeping their order"""
+    # Fetch all member documents in one batched round-trip (results arrive unordered)
+    snapshots = {snap.id: snap async for snap in db.get_all(member_refs)}
+    return [
+        member_profile(snapshots[member_ref.id])
+        for member_ref in member_refs
+        if member_ref.id in snapshots and snapshots[member_ref.id].exists
+    ]
+
+async def get_board_members(task_board_data: dict):
     """Get all members of a task board with their details"""
-    task_board = task_board_ref.get()
-    if not task_board.exists:
-        return []  # Return an empty list if the task board does not exist
-    members = []
-    for member_ref in task_board.to_dict().get("members", []):
-        member = member_ref.get()
-        if member.exists:
-            member_data = member.to_dict()
-            members.append({
-                "id": member_ref.id,
-                "name": member_data.get("fullName", "Unknown User"),
-                "email": member_data.get("email", "")
-            })
-    return members
+    if "member_profiles" in task_board_data:
+        # Member details are denormalized onto the board, so no per-member reads are needed
+        return task_board_data["member_profiles"]
+    return await get_member_profiles(task_board_data.get("members", []))
+
+async def get_all_users() -> list:
+    """Get display fields of every user, cached since the directory rarely changes"""
+    if "users" not in users_cache:
+        users_cache["users"] = [member_profile(doc) async for doc in USERS.stream()]
+    return users_cache["users"]
 
 async def get_available_users(user_uid: str, exclude_ids: list = None):
     """Get all users except current user and excluded IDs"""
     exclude_ids = exclude_ids or []
-    users = []
-    users_ref = db.collection("users")
-    docs = users_ref.stream()
-    for doc in docs:
-        if doc.id != user_uid and doc.id not in exclude_ids:
-            user_data = doc.to_dict()
-            users.append({
-                "id": doc.id,
-                "name": user_data.get("fullName", "Unknown User"),
-                "email": user_data.get("email", "")
-            })
-    return users
+    return [
+        user for user in await get_all_users()
+        if user["id"] != user_uid and user["id"] not in exclude_ids
+    ]
 
 # Authentication Routes
 @app.get("/", response_class=HTMLResponse)
@@ -85,10 +219,7 @@ async def register(request: Request):
 
 # Board Routes
 @app.get("/create-board", response_class=HTMLResponse)
-async def create_board(request: Request):
-    user_uid = await get_user_uid(request)
-    if isinstance(user_uid, RedirectResponse):
-        return user_uid
+async def create_board(request: Request, user_uid: str = Depends(current_user)):
     users = await get_available_users(user_uid)
     return templates.TemplateResponse("create_board.html", {
         "request": request,
@@ -100,53 +231,58 @@ async def create_taskboard(
     request: Request,
     name: str = Form(...),
     description: str = Form(...),
-    users: list[str] = Form([])
+    users: list[str] = Form([]),
+    user_uid: str = Depends(current_user)
 ):
-    user_uid = await get_user_uid(request)
-    if isinstance(user_uid, RedirectResponse):
-        return user_uid
-    taskboard_ref = db.collection("task_boards").document()
+    taskboard_ref = BOARDS.document()
+    member_refs = [USERS.document(user_uid)] + [USERS.document(uid) for uid in users]
     
-    taskboard_ref.set({
+    # Create the board and add it to all members' taskboards in a single atomic commit
+    batch = db.batch()
+    batch.set(taskboard_ref, {
         "name": name,
         "description": description,
-        "created_by": db.collection("users").document(user_uid),
+        "created_by": USERS.document(user_uid),
         "created_at": firestore.SERVER_TIMESTAMP,
-        "members": [db.collection("users").document(user_uid)] + 
-                   [db.collection("users").document(uid) for uid in users]
+        "members": member_refs,
+        "member_profiles": await get_member_profiles(member_refs),
+        "task_count": 0,
+        "summarize_tasks": True,
+        "tasks_summary": {}
     })
-    
-    # Add reference to all members' taskboards
-    member_ids = [user_uid] + users
-    for member_id in member_ids:
-        member_ref = db.collection("users").document(member_id)
-        member_ref.update({"task_boards": firestore.ArrayUnion([taskboard_ref])})
+    for member_ref in member_refs:
+        batch.update(member_ref, {"task_boards": firestore.ArrayUnion([taskboard_ref])})
+    await batch.commit()
     
     return RedirectResponse(url="/home", status_code=303)
 
 @app.get("/task-board/{task_board_id}", response_class=HTMLResponse)
-async def task_board(request: Request, task_board_id: str):
-    user_uid = await get_user_uid(request)
-    if isinstance(user_uid, RedirectResponse):
-        return user_uid
-    task_board_ref = db.collection("task_boards").document(task_board_id)
+async def task_board(
+    request: Request,
+    task_board_id: str,
+    user_uid: str = Depends(current_user),
+    task_board_data: dict = Depends(get_task_board_with_tasks)
+):
+    task_board_ref = BOARDS.document(task_board_id)
     
     # Verify access
-    if not await is_board_member(user_uid, task_board_ref):
+    if not is_board_member(user_uid, task_board_data):
         raise HTTPException(status_code=403, detail="Access denied")
     
-    task_board_data = task_board_ref.get().to_dict()
-    members = await get_board_members(task_board_ref)
-    is_creator = await is_board_creator(user_uid, task_board_ref)
-    
-    # Get tasks
-    tasks = []
-    tasks_query = task_board_ref.collection("tasks")
-    for task_doc in tasks_query.stream():
-        task_data = task_doc.to_dict()
-        task_data['id'] = task_doc.id
-        task_data['assigned_members'] = [m.id for m in task_data.get('assigned_members', [])]
-        tasks.append(task_data)
+    is_creator = is_board_creator(user_uid, task_board_data)
+    
+    if task_board_data.get("summarize_tasks"):
+        # Tasks are summarized on the board itself, ordered by ID like the subcollection
+        members = await get_board_members(task_board_data)
+        tasks = [summary for _, summary in sorted(task_board_data["tasks_summary"].items())]
+    else:
+        # Fetch members and tasks concurrently
+        tasks_query = task_board_ref.collection("tasks")
+        members, task_docs = await asyncio.gather(
+            get_board_members(task_board_data),
+            tasks_query.get()
+        )
+        tasks = [task_summary(task_doc.id, task_doc.to_dict()) for task_doc in task_docs]
 
     return templates.TemplateResponse("task_board.html", {
         "request": request,
@@ -160,17 +296,16 @@ async def task_board(request: Request, task_board_id: str):
     })
 
 @app.get("/task-board/{task_board_id}/edit")
-async def edit_task_board_page(request: Request, task_board_id: str):
-    user_uid = await get_user_uid(request)
-    if isinstance(user_uid, RedirectResponse):
-        return user_uid
-    task_board_ref = db.collection("task_boards").document(task_board_id)
-    
-    if not await is_board_creator(user_uid, task_board_ref):
+async def edit_task_board_page(
+    request: Request,
+    task_board_id: str,
+    user_uid: str = Depends(current_user),
+    task_board_data: dict = Depends(get_task_board)
+):
+    if not is_board_creator(user_uid, task_board_data):
         raise HTTPException(status_code=403, detail="Only the creator can edit this board")
     
-    task_board_data = task_board_ref.get().to_dict()
-    members = await get_board_members(task_board_ref)
+    members = await get_board_members(task_board_data)
     
     return templates.TemplateResponse("edit_board.html", {
         "request": request,
@@ -184,51 +319,52 @@ async def update_task_board(
     request: Request,
     task_board_id: str,
     name: str = Form(...),
-    description: str = Form(...)
+    description: str = Form(...),
+    user_uid: str = Depends(current_user),
+    task_board_data: dict = Depends(get_task_board_access)
 ):
-    user_uid = await get_user_uid(request)
-    if isinstance(user_uid, RedirectResponse):
-        return user_uid
-    task_board_ref = db.collection("task_boards").document(task_board_id)
-    
-    if not await is_board_creator(user_uid, task_board_ref):
+    if not is_board_creator(user_uid, task_board_data):
         raise HTTPException(status_code=403, detail="Only the creator can edit this board")
     
-    task_board_ref.update({"name": name, "description": description})
+    await BOARDS.document(task_board_id).update({"name": name, "description": description})
     return RedirectResponse(url=f"/task-board/{task_board_id}", status_code=303)
 
-@app.post("/task-board/{task_board_id}/delete")
-async def delete_task_board(request: Request, task_board_id: str):
-    user_uid = await get_user_uid(request)
-    if isinstance(user_uid, RedirectResponse):
-        return user_uid
-    task_board_ref = db.collection("task_boards").document(task_board_id)
+@app.post("/task-board/{task_board_id}/delete", response_class=ORJSONResponse)
+async def delete_task_board(
+    request: Request,
+    task_board_id: str,
+    user_uid: str = Depends(current_user),
+    task_board_data: dict = Depends(get_task_board_access)
+):
+    task_board_ref = BOARDS.document(task_board_id)
     
-    if not await is_board_creator(user_uid, task_board_ref):
+    if not is_board_creator(user_uid, task_board_data):
         raise HTTPException(status_code=403, detail="Only the creator can delete the board")
     
-    # Check if board has any tasks
-    tasks_query = task_board_ref.collection("tasks").limit(1)
-    if len(list(tasks_query.stream())) > 0:
+    # Check if board has any tasks (boards created before the counter still need a query)
+    if "task_count" in task_board_data:
+        has_tasks = task_board_data["task_count"] > 0
+    else:
+        has_tasks = len(await task_board_ref.collection("tasks").limit(1).get()) > 0
+    if has_tasks:
         raise HTTPException(
             status_code=400,
             detail="Cannot delete board with existing tasks. Please delete all tasks first."
         )
     
     # Get current members (excluding creator)
-    members = await get_board_members(task_board_ref)
-    if len(members) > 1:  # More than just the creator
+    if len(task_board_data.get("members", [])) > 1:  # More than just the creator
         raise HTTPException(
             status_code=400,
             detail="Cannot delete board with members. Please remove all members first."
         )
     
     # Delete the board
-    task_board_ref.delete()
+    await task_board_ref.delete()
     
     # Remove board reference from creator
-    creator_ref = db.collection("users").document(user_uid)
-    creator_ref.update({
+    creator_ref = USERS.document(user_uid)
+    await creator_ref.update({
         "task_boards": firestore.ArrayRemove([task_board_ref])
     })
     
@@ -238,72 +374,104 @@ async def delete_task_board(request: Request, task_board_id: str):
     }
 
 # Member Management Routes
-@app.post("/task-board/{task_board_id}/add-member")
-async def add_board_member(request: Request, task_board_id: str):
-    user_uid = await get_user_uid(request)
-    if isinstance(user_uid, RedirectResponse):
-        return user_uid
-    task_board_ref = db.collection("task_boards").document(task_board_id)
-    
-    if not await is_board_creator(user_uid, task_board_ref):
+@app.post("/task-board/{task_board_id}/add-member", response_class=ORJSONResponse)
+async def add_board_member(
+    request: Request,
+    task_board_id: str,
+    user_uid: str = Depends(current_user),
+    task_board_data: dict = Depends(get_task_board_membership)
+):
+    task_board_ref = BOARDS.document(task_board_id)
+    
+    if not is_board_creator(user_uid, task_board_data):
         raise HTTPException(status_code=403, detail="Only the creator can add members")
     
     data = await request.json()
     member_id = data.get('user_id')
-    member_ref = db.collection("users").document(member_id)
+    member_ref = USERS.document(member_id)
+    member = await member_ref.get()
     
-    if not member_ref.get().exists:
+    if not member.exists:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Add to board members
-    task_board_ref.update({"members": firestore.ArrayUnion([member_ref])})
-    member_ref.update({"task_boards": firestore.ArrayUnion([task_board_ref])})
+    board_update = {"members": firestore.ArrayUnion([member_ref])}
+    already_member = is_board_member(member_id, task_board_data)
+    if "member_profiles" in task_board_data:
+        # An existing member's profile may have changed since, so a union would add a second entry
+        if not already_member:
+            board_update["member_profiles"] = firestore.ArrayUnion([member_profile(member)])
+    else:
+        # Boards created before member profiles were denormalized get the full list backfilled
+        member_refs = task_board_data.get("members", [])
+        if not already_member:
+            member_refs = member_refs + [member_ref]
+        board_update["member_profiles"] = await get_member_profiles(member_refs)
+    await task_board_ref.update(board_update)
+    await member_ref.update({"task_boards": firestore.ArrayUnion([task_board_ref])})
     
     return {"status": "success"}
 
-@app.post("/task-board/{task_board_id}/remove-member")
-async def remove_board_member(request: Request, task_board_id: str):
-    user_uid = await get_user_uid(request)
-    if isinstance(user_uid, RedirectResponse):
-        return user_uid
-    task_board_ref = db.collection("task_boards").document(task_board_id)
+@app.post("/task-board/{task_board_id}/remove-member", response_class=ORJSONResponse)
+async def remove_board_member(
+    request: Request,
+    task_board_id: str,
+    user_uid: str = Depends(current_user),
+    task_board_data: dict = Depends(get_task_board)
+):
+    task_board_ref = BOARDS.document(task_board_id)
     
-    if not await is_board_creator(user_uid, task_board_ref):
+    if not is_board_creator(user_uid, task_board_data):
         raise HTTPException(status_code=403, detail="Only the creator can remove members")
     
     data = await request.json()
     member_id = data.get('user_id')
-    member_ref = db.collection("users").document(member_id)
+    member_ref = USERS.document(member_id)
     
     # Remove from board members
-    task_board_ref.update({"members": firestore.ArrayRemove([member_ref])})
+    board_update = {"members": firestore.ArrayRemove([member_ref])}
+    # ArrayRemove matches whole entries, so remove the exact stored profiles (if there are any)
+    stale_profiles = [
+        profile for profile in task_board_data.get("member_profiles", []) if profile["id"] == member_id
+    ]
+    if stale_profiles:
+        board_update["member_profiles"] = firestore.ArrayRemove(stale_profiles)
     
     # Remove board from member's task_boards
-    member_ref.update({"task_boards": firestore.ArrayRemove([task_board_ref])})
-    
-    # Unassign from all tasks
-    tasks_query = task_board_ref.collection("tasks")
-    for task_doc in tasks_query.stream():
-        task_data = task_doc.to_dict()
-        if "assigned_members" in task_data:
-            updated_assignments = [m for m in task_data["assigned_members"] if m.id != member_id]
-            task_doc.reference.update({"assigned_members": updated_assignments})
+    await member_ref.update({"task_boards": firestore.ArrayRemove([task_board_ref])})
+    
+    # Unassign from the tasks they are on, committing in batches (at most 500 writes each)
+    summarize_tasks = task_board_data.get("summarize_tasks")
+    tasks_query = task_board_ref.collection("tasks").where("assigned_members", "array_contains", member_ref)
+    batch = db.batch()
+    pending_writes = 0
+    async for task_doc in tasks_query.stream():
+        batch.update(task_doc.reference, {"assigned_members": firestore.ArrayRemove([member_ref])})
+        if summarize_tasks:
+            board_update[task_summary_path(task_doc.id, "assigned_members")] = firestore.ArrayRemove([member_id])
+        pending_writes += 1
+        if pending_writes == 500:
+            await batch.commit()
+            batch = db.batch()
+            pending_writes = 0
+    if pending_writes:
+        await batch.commit()
+    await task_board_ref.update(board_update)
     
     return {"status": "success"}
 
 # Task Routes
 @app.get("/task-board/{task_board_id}/add-task", response_class=HTMLResponse)
-async def add_task_page(request: Request, task_board_id: str):
-    user_uid = await get_user_uid(request)
-    if isinstance(user_uid, RedirectResponse):
-        return user_uid
-    task_board_ref = db.collection("task_boards").document(task_board_id)
-    
-    if not await is_board_member(user_uid, task_board_ref):
+async def add_task_page(
+    request: Request,
+    task_board_id: str,
+    user_uid: str = Depends(current_user),
+    task_board_data: dict = Depends(get_task_board)
+):
+    if not is_board_member(user_uid, task_board_data):
         raise HTTPException(status_code=403, detail="Access denied")
     
-    task_board_data = task_board_ref.get().to_dict()
-    members = await get_board_members(task_board_ref)
+    members = await get_board_members(task_board_data)
     
     return templates.TemplateResponse("add_task.html", {
         "request": request,
@@ -319,59 +487,80 @@ async def create_task(
     title: str = Form(...),
     description: str = Form(...),
     deadline: str = Form(None),
-    assigned_members: list[str] = Form([])
+    assigned_members: list[str] = Form([]),
+    user_uid: str = Depends(current_user),
+    task_board_data: dict = Depends(get_task_board)
 ):
-    user_uid = await get_user_uid(request)
-    if isinstance(user_uid, RedirectResponse):
-        return user_uid
-    task_board_ref = db.collection("task_boards").document(task_board_id)
+    task_board_ref = BOARDS.document(task_board_id)
 
-    if not await is_board_member(user_uid, task_board_ref):
+    if not is_board_member(user_uid, task_board_data):
         raise HTTPException(status_code=403, detail="Access denied")
 
-    # Check for existing tasks with the same title
-    existing_tasks_query = task_board_ref.collection("tasks").where("title", "==", title)
-    existing_tasks = existing_tasks_query.stream()
-
-    if any(existing_tasks):
-        task_board_data = task_board_ref.get().to_dict()
-        members = await get_board_members(task_board_ref)
-        return templates.TemplateResponse("add_task.html", {
-            "request": request,
-            "task_board_name": task_board_data.get("name"),
-            "task_board_id": task_board_id,
-            "members": members,
-            "error": "A task with this name already exists."
-        })
-
     task_data = {
         "title": title,
         "description": description,
         "status": "InComplete",
         "created_at": firestore.SERVER_TIMESTAMP,
-        "created_by": db.collection("users").document(user_uid),
+        "created_by": USERS.document(user_uid),
         "task_board": task_board_ref,
-        "assigned_members": [db.collection("users").document(uid) for uid in assigned_members]
+        "assigned_members": [USERS.document(uid) for uid in assigned_members]
     }
 
-    if deadline:
-        task_data["deadline"] = datetime.strptime(deadline, "%Y-%m-%d")
-
-    task_board_ref.collection("tasks").document().set(task_data)
+    parsed_deadline = parse_deadline(deadline)
+    if parsed_deadline:
+        task_data["deadline"] = parsed_deadline
+
+    # The ID is derived from the title, so create() fails if a task with this title already exists
+    task_id = task_id_for(title)
+    batch = db.batch()
+    batch.create(task_board_ref.collection("tasks").document(task_id), task_data)
+    board_update = {}
+    if "task_count" in task_board_data:
+        board_update["task_count"] = firestore.Increment(1)
+    if task_board_data.get("summarize_tasks"):
+        if task_board_data.get("task_count", 0) < TASKS_SUMMARY_LIMIT:
+            board_update[task_summary_path(task_id)] = task_summary(task_id, task_data)
+        else:
+            # Too many tasks to summarize on the board, so read them from the subcollection from now on
+            board_update["summarize_tasks"] = False
+            board_update["tasks_summary"] = firestore.DELETE_FIELD
+    if board_update:
+        batch.update(task_board_ref, board_update)
+    # Boards that never summarized their tasks may still hold tasks with random IDs, so also look them up by title
+    duplicate = "summarize_tasks" not in task_board_data and await has_task_titled(task_board_ref, title)
+    if not duplicate:
+        try:
+            await batch.commit()
+        except AlreadyExists:
+            duplicate = True
+    if duplicate:
+        members = await get_board_members(task_board_data)
+        return templates.TemplateResponse("add_task.html", {
+            "request": request,
+            "task_board_name": task_board_data.get("name"),
+            "task_board_id": task_board_id,
+            "members": members,
+            "error": "A task with this name already exists."
+        })
     return RedirectResponse(url=f"/task-board/{task_board_id}", status_code=303)
 
 @app.get("/task-board/{task_board_id}/tasks/{task_id}/edit")
-async def edit_task_page(request: Request, task_board_id: str, task_id: str):
-    user_uid = await get_user_uid(request)
-    if isinstance(user_uid, RedirectResponse):
-        return user_uid
-    task_ref = db.collection("task_boards").document(task_board_id).collection("tasks").document(task_id)
-    task_data = task_ref.get().to_dict()
-    
-    if not await is_board_member(user_uid, task_data["task_board"]):
+async def edit_task_page(
+    request: Request,
+    task_board_id: str,
+    task_id: str,
+    user_uid: str = Depends(current_user),
+    task_board_data: dict = Depends(get_task_board)
+):
+    if not is_board_member(user_uid, task_board_data):
         raise HTTPException(status_code=403, detail="Access denied")
     
-    members = await get_board_members(task_data["task_board"])
+    task_ref = BOARDS.document(task_board_id).collection("tasks").document(task_id)
+    task_snap, members = await asyncio.gather(
+        task_ref.get(),
+        get_board_members(task_board_data)
+    )
+    task_data = task_snap.to_dict()
     
     return templates.TemplateResponse("edit_task.html", {
         "request": request,
@@ -393,105 +582,160 @@ async def update_task(
     task_id: str,
     title: str = Form(...),
     description: str = Form(...),
-    deadline: str = Form(None)
+    deadline: str = Form(None),
+    user_uid: str = Depends(current_user),
+    task_board_data: dict = Depends(get_task_board)
 ):
     form_data = await request.form()
     assigned_members = form_data.getlist("assigned_members")
-    user_uid = await get_user_uid(request)
-    if isinstance(user_uid, RedirectResponse):
-        return user_uid
-    task_ref = db.collection("task_boards").document(task_board_id).collection("tasks").document(task_id)
-    task_data = task_ref.get().to_dict()
+    task_board_ref = BOARDS.document(task_board_id)
+    task_ref = task_board_ref.collection("tasks").document(task_id)
 
-    if not await is_board_member(user_uid, task_data["task_board"]):
+    if not is_board_member(user_uid, task_board_data):
         raise HTTPException(status_code=403, detail="Access denied")
 
-    parsed_deadline = None
-    if deadline:
-        try:
-            parsed_deadline = datetime.strptime(deadline, "%Y-%m-%d")
-        except ValueError:
-            parsed_deadline = None
-    members = await get_board_members(db.collection("task_boards").document(task_board_id))
-    # 🔍 Check for duplicate title in the same task board
-    tasks = db.collection("task_boards").document(task_board_id).collection("tasks").where("title", "==", title).stream()
-    for t in tasks:
-        if t.id != task_id:  # Skip if it's the same task
-            return templates.TemplateResponse("edit_task.html", {
-                "request": request,
-                "task": {
-                    "id": task_id,
-                    "title": title,
-                    "description": description,
-                    "deadline": parsed_deadline,
-                    "assigned_members": assigned_members,
-                    "task_board": {"id": task_board_id}
-                },
-                "members": members,
-                "error": "A task with this title already exists."
-            })
-
+    parsed_deadline = parse_deadline(deadline)
     update_data = {
         "title": title,
         "description": description,
         "updated_at": firestore.SERVER_TIMESTAMP,
-        "assigned_members": [db.collection("users").document(uid) for uid in assigned_members],
+        "assigned_members": [USERS.document(uid) for uid in assigned_members],
         "status": "InComplete"
     }
 
-    if deadline:
-        update_data["deadline"] = datetime.strptime(deadline, "%Y-%m-%d")
-
-    task_ref.update(update_data)
+    if parsed_deadline:
+        update_data["deadline"] = parsed_deadline
+
+    new_task_id = task_id_for(title)
+    task_data = None
+    if new_task_id != task_id:
+        task_snap = await task_ref.get()
+        if not task_snap.exists:
+            raise HTTPException(status_code=404, detail="Task not found")
+        task_data = task_snap.to_dict()
+
+    batch = db.batch()
+    # Tasks created before title-derived IDs keep their random ID while their title is unchanged
+    if new_task_id == task_id or task_data.get("title") == title:
+        batch.update(task_ref, update_data)
+        if task_board_data.get("summarize_tasks"):
+            summary_update = {
+                task_summary_path(task_id, "title"): title,
+                task_summary_path(task_id, "description"): summary_description(description),
+                task_summary_path(task_id, "status"): "InComplete",
+                task_summary_path(task_id, "assigned_members"): assigned_members
+            }
+            if parsed_deadline:
+                summary_update[task_summary_path(task_id, "deadline")] = parsed_deadline
+            batch.update(task_board_ref, summary_update)
+        await batch.commit()
+        return RedirectResponse(url=f"/task-board/{task_board_id}", status_code=303)
+
+    # 🔍 Title changed: move the task to its new title-derived ID, failing if that title is taken
+    moved_task = {**task_data, **update_data}
+    batch.create(task_board_ref.collection("tasks").document(new_task_id), moved_task)
+    batch.delete(task_ref)
+    if task_board_data.get("summarize_tasks"):
+        batch.update(task_board_ref, {
+            task_summary_path(task_id): firestore.DELETE_FIELD,
+            task_summary_path(new_task_id): task_summary(new_task_id, moved_task)
+        })
+    duplicate = "summarize_tasks" not in task_board_data and await has_task_titled(task_board_ref, title, exclude_id=task_id)
+    if not duplicate:
+        try:
+            await batch.commit()
+        except AlreadyExists:
+            duplicate = True
+    if duplicate:
+        members = await get_board_members(task_board_data)
+        return templates.TemplateResponse("edit_task.html", {
+            "request": request,
+            "task": {
+                "id": task_id,
+                "title": title,
+                "description": description,
+                "deadline": parsed_deadline,
+                "assigned_members": assigned_members,
+                "task_board": {"id": task_board_id}
+            },
+            "members": members,
+            "error": "A task with this title already exists."
+        })
     return RedirectResponse(url=f"/task-board/{task_board_id}", status_code=303)
 
 
-@app.post("/task-board/{task_board_id}/tasks/{task_id}/complete")
-async def complete_task(request: Request, task_board_id: str, task_id: str):
-    user_uid = await get_user_uid(request)
-    if isinstance(user_uid, RedirectResponse):
-        return user_uid
-    task_ref = db.collection("task_boards").document(task_board_id).collection("tasks").document(task_id)
-    task_data = task_ref.get().to_dict()
+@app.post("/task-board/{task_board_id}/tasks/{task_id}/complete", response_class=ORJSONResponse)
+async def complete_task(
+    request: Request,
+    task_board_id: str,
+    task_id: str,
+    user_uid: str = Depends(current_user),
+    task_board_data: dict = Depends(get_task_board_access)
+):
+    task_board_ref = BOARDS.document(task_board_id)
+    task_ref = task_board_ref.collection("tasks").document(task_id)
+    task_data = (await task_ref.get()).to_dict()
     
     # Verify user is assigned to this task
     if user_uid not in [m.id for m in task_data.get('assigned_members', [])]:
         raise HTTPException(status_code=403, detail="Not assigned to this task")
     
-    task_ref.update({
+    batch = db.batch()
+    batch.update(task_ref, {
         "status": "completed",
         "completed_at": firestore.SERVER_TIMESTAMP
     })
+    if task_board_data.get("summarize_tasks"):
+        batch.update(task_board_ref, {
+            task_summary_path(task_id, "status"): "completed",
+            task_summary_path(task_id, "completed_at"): firestore.SERVER_TIMESTAMP
+        })
+    await batch.commit()
     return {"status": "success"}
 
 @app.post("/task-board/{task_board_id}/tasks/{task_id}/delete")
-async def delete_task(request: Request, task_board_id: str, task_id: str):
-    user_uid = await get_user_uid(request)
-    task_ref = db.collection("task_boards").document(task_board_id).collection("tasks").document(task_id)
-    task_data = task_ref.get().to_dict()
+async def delete_task(
+    request: Request,
+    task_board_id: str,
+    task_id: str,
+    user_uid: str = Depends(current_user),
+    task_board_data: dict = Depends(get_task_board_access)
+):
+    task_board_ref = BOARDS.document(task_board_id)
+    task_ref = task_board_ref.collection("tasks").document(task_id)
     
-    if not await is_board_member(user_uid, task_data["task_board"]):
+    if not is_board_member(user_uid, task_board_data):
         raise HTTPException(status_code=403, detail="Access denied")
     
-    task_ref.delete()
+    # Only decrement the counter if the task really existed
+    batch = db.batch()
+    batch.delete(task_ref, option=db.write_option(exists=True))
+    board_update = {}
+    if task_board_data.get("summarize_tasks"):
+        board_update[task_summary_path(task_id)] = firestore.DELETE_FIELD
+    if "task_count" in task_board_data:
+        board_update["task_count"] = firestore.Increment(-1)
+    batch.update(task_board_ref, board_update)
+    try:
+        await batch.commit()
+    except NotFound:
+        raise HTTPException(status_code=404, detail="Task not found")
     return RedirectResponse(url=f"/task-board/{task_board_id}", status_code=303)
 
 # User Routes
 @app.get("/home", response_class=HTMLResponse)
-async def home(request: Request):
-    user_uid = await get_user_uid(request)
-    if isinstance(user_uid, RedirectResponse):
-        return user_uid
-    if isinstance(user_uid, RedirectResponse):
-        return user_uid
-    user_ref = db.collection("users").document(user_uid)
-    user_data = user_ref.get().to_dict()
+async def home(request: Request, user_uid: str = Depends(current_user)):
+    user_ref = USERS.document(user_uid)
+    user_data = (await user_ref.get()).to_dict()
 
     task_boards = []
     if "task_boards" in user_data:
-        for board_ref in user_data["task_boards"]:
-            board = board_ref.get()
-            if board.exists:
+        board_refs = user_data["task_boards"]
+        board_fields = ["name", "description", "created_by"]
+        snapshots = {snap.id: snap async for snap in db.get_all(board_refs, field_paths=board_fields)}
+        for board_ref in board_refs:
+            board = snapshots.get(board_ref.id)
+            if board and board.exists:
                 task_boards.append({
                     "id": board_ref.id,
                     "name": board.get("name"),
@@ -505,66 +749,42 @@ async def home(request: Request):
         "task_boards": task_boards
     })
 
-@app.get("/api/users/search")
-async def search_users(request: Request, q: str, board_id: str = None):
-    user_uid = await get_user_uid(request)
-    if isinstance(user_uid, RedirectResponse):
-        return user_uid
-    users_ref = db.collection("users")
-    
-    # Search by name and email
-    name_query = users_ref.where("fullName", ">=", q).where("fullName", "<=", q + "\uf8ff")
-    email_query = users_ref.where("email", ">=", q).where("email", "<=", q + "\uf8ff")
-    
+@app.get("/api/users/search", response_class=ORJSONResponse)
+async def search_users(
+    request: Request,
+    q: str,
+    board_id: str = None,
+    user_uid: str = Depends(current_user)
+):
     # Get current board members if board_id provided
     current_members = set()
     if board_id:
-        board_ref = db.collection("task_boards").document(board_id)
-        board = board_ref.get()
+        board_ref = BOARDS.document(board_id)
+        board = await board_ref.get(field_paths=["members"])
         if board.exists:
             current_members = {m.id for m in board.to_dict().get("members", [])}
     
-    # Combine and deduplicate results
-    seen_ids = set()
-    users = []
-    
-    for doc in name_query.stream():
-        if doc.id != user_uid and doc.id not in seen_ids and doc.id not in current_members:
-            seen_ids.add(doc.id)
-            user_data = doc.to_dict()
-            users.append({
-                "id": doc.id,
-                "name": user_data.get("fullName", "Unknown User"),
-                "email": user_data.get("email", "")
-            })
-    
-    for doc in email_query.stream():
-        if doc.id != user_uid and doc.id not in seen_ids and doc.id not in current_members:
-            seen_ids.add(doc.id)
-            user_data = doc.to_dict()
-            users.append({
-                "id": doc.id,
-                "name": user_data.get("fullName", "Unknown User"),
-                "email": user_data.get("email", "")
-            })
-    
-    return users
-
-@app.post("/task-board/{task_board_id}/tasks/{task_id}/assign")
+    # Search by name and email against the cached user directory
+    query = q.lower()
+    return [
+        user for user in await get_available_users(user_uid, current_members)
+        if query in user["name"].lower() or query in user["email"].lower()
+    ]
+
+@app.post("/task-board/{task_board_id}/tasks/{task_id}/assign", response_class=ORJSONResponse)
 async def assign_task(
     request: Request,
     task_board_id: str,
-    task_id: str
+    task_id: str,
+    user_uid: str = Depends(current_user),
+    task_board_data: dict = Depends(get_task_board)
 ):
     """Assign members to a task."""
-    user_uid = await get_user_uid(request)
-    if isinstance(user_uid, RedirectResponse):
-        return user_uid
-    task_board_ref = db.collection("task_boards").document(task_board_id)
+    task_board_ref = BOARDS.document(task_board_id)
     task_ref = task_board_ref.collection("tasks").document(task_id)
     
     # Verify user has access to the board
-    if not await is_board_member(user_uid, task_board_ref):
+    if not is_board_member(user_uid, task_board_data):
         raise HTTPException(status_code=403, detail="Access denied")
     
     data = await request.json()
@@ -574,7 +794,7 @@ async def assign_task(
         raise HTTPException(status_code=400, detail="No members specified")
     
     # Verify all members belong to the board
-    board_members = await get_board_members(task_board_ref)
+    board_members = await get_board_members(task_board_data)
     board_member_ids = {m['id'] for m in board_members}
     
     for member_id in member_ids:
@@ -585,11 +805,15 @@ async def assign_task(
             )
     
     # Convert member IDs to user references
-    user_refs = [db.collection("users").document(uid) for uid in member_ids]
+    user_refs = [USERS.document(uid) for uid in member_ids]
     
     # Update task with new assigned members (replace existing ones)
-    task_ref.update({
+    batch = db.batch()
+    batch.update(task_ref, {
         "assigned_members": user_refs
     })
+    if task_board_data.get("summarize_tasks"):
+        batch.update(task_board_ref, {task_summary_path(task_id, "assigned_members"): member_ids})
+    await batch.commit()
     
     return {"status": "success", "message": "Task assigned successfully"}